@@ -4,61 +4,248 @@ Provides tools to analyze and fix Coverity static analysis issues
 """
 
 from fastmcp import FastMCP
+import functools
+import io
+import itertools
 import json
 import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, NamedTuple, Tuple
+
+from utils.fileio import READ_BUFFER_SIZE, decode_text, has_parent_reference
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when orjson is not installed
+    orjson = None
 
 # Initialize FastMCP server
 mcp = FastMCP("Coverity Issue Fixer")
 
+# Project root: the directory the server was started from
+_PROJECT_ROOT = os.getcwd()
+
+# Separator lines for the tool responses, newline included
+_SEP_EQ = "=" * 80 + "\n"
+_SEP_DASH = "-" * 80 + "\n"
+
+@functools.lru_cache(maxsize=128)
+def _read_bytes_cached(abs_path: str, mtime_ns: int, size: int) -> bytes:
+    """Read a file once per (path, mtime, size); a changed file gets a new key"""
+    with open(abs_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        return f.read()
+
+def _read_bytes(file_path: str, project_root: str) -> bytes:
+    """Read a project file's raw bytes; raises OSError if it cannot be read"""
+    full_path = os.path.join(project_root, file_path)
+    st = os.stat(full_path)
+    return _read_bytes_cached(full_path, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=256)
+def _is_safe_path(file_path: str) -> bool:
+    """Check that a project-relative path does not contain a ".." component"""
+    return not has_parent_reference(file_path)
+
+class _LineIndex(NamedTuple):
+    """Raw file bytes plus the byte offset at which each line starts"""
+    data: bytes
+    offsets: Tuple[int, ...]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def text(self, start: int, end: int) -> str:
+        """Decode lines[start:end] only, translating newlines like text-mode reads"""
+        span = range(len(self))[start:end]
+        if not span:
+            return ""
+        raw = self.data[self.offsets[span.start]:self.offsets[span.stop]]
+        return decode_text(raw)
+
+    def line(self, number: int) -> str:
+        """Decode a single line, indexed like a list of lines"""
+        index = range(len(self))[number]
+        return self.text(index, index + 1)
+
+@functools.lru_cache(maxsize=128)
+def _read_line_index_cached(abs_path: str, mtime_ns: int, size: int) -> _LineIndex:
+    """Index where each line of a cached file starts"""
+    data = _read_bytes_cached(abs_path, mtime_ns, size)
+    # bytes.splitlines breaks on \n, \r\n and \r, the same as text-mode reads
+    offsets = tuple(itertools.accumulate(map(len, data.splitlines(keepends=True)), initial=0))
+    return _LineIndex(data, offsets)
+
+def _read_line_index(file_path: str, project_root: str) -> _LineIndex:
+    """Read and index a project file; raises OSError if it cannot be read"""
+    full_path = os.path.join(project_root, file_path)
+    st = os.stat(full_path)
+    return _read_line_index_cached(full_path, st.st_mtime_ns, st.st_size)
+
+def _load_coverity_json(json_full_path: str) -> Dict[str, Any]:
+    """Parse the Coverity issues JSON file, with orjson when it is available"""
+    with open(json_full_path, 'rb') as f:
+        raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+@functools.lru_cache(maxsize=8)
+def _load_issue_index(json_full_path: str, mtime_ns: int, size: int) -> Dict[str, Tuple[Dict[str, Any], ...]]:
+    """Parse a Coverity issues JSON file and group its issues by file, once per (path, mtime, size)"""
+    index: Dict[str, List[Dict[str, Any]]] = {}
+    for issue in _load_coverity_json(json_full_path).get('issues', []):
+        file_path = issue.get('file')
+        if isinstance(file_path, str):
+            index.setdefault(file_path, []).append(issue)
+    return {file_path: tuple(file_issues) for file_path, file_issues in index.items()}
+
 def read_file_content(file_path: str, project_root: str = None) -> str:
     """Read file content from the project directory"""
     if project_root is None:
-        project_root = os.getcwd()
+        project_root = _PROJECT_ROOT
     
-    full_path = os.path.join(project_root, file_path)
-    
-    if not os.path.exists(full_path):
-        return f"Error: File {file_path} not found"
+    if not _is_safe_path(file_path):
+        return f"Error: Invalid file path {file_path}"
     
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return decode_text(_read_bytes(file_path, project_root))
+    except (FileNotFoundError, NotADirectoryError):
+        return f"Error: File {file_path} not found"
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
 def get_file_context(file_path: str, line_number: int, context_lines: int = 5, project_root: str = None) -> Dict[str, Any]:
     """Get file context around the issue line"""
     if project_root is None:
-        project_root = os.getcwd()
-    
-    full_path = os.path.join(project_root, file_path)
+        project_root = _PROJECT_ROOT
     
-    if not os.path.exists(full_path):
-        return {"error": f"File {file_path} not found"}
+    if not _is_safe_path(file_path):
+        return {"error": f"Invalid file path {file_path}"}
     
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        line_index = _read_line_index(file_path, project_root)
+        total_lines = len(line_index)
         
         start_line = max(0, line_number - context_lines - 1)
-        end_line = min(len(lines), line_number + context_lines)
+        end_line = min(total_lines, line_number + context_lines)
+        context_text = line_index.text(start_line, end_line)
+        
+        # Split once here so callers don't have to re-split "context"
+        lines = context_text.split('\n')
+        if not lines[-1]:
+            lines.pop()
         
         context = {
             "file_path": file_path,
             "target_line": line_number,
             "start_line": start_line + 1,
             "end_line": end_line,
-            "context": "".join(lines[start_line:end_line]),
-            "issue_line": lines[line_number - 1].strip() if line_number <= len(lines) else "",
-            "total_lines": len(lines)
+            "context": context_text,
+            "lines": lines,
+            "issue_line": line_index.line(line_number - 1).strip() if line_number <= total_lines else "",
+            "total_lines": total_lines
         }
         
         return context
+    except (FileNotFoundError, NotADirectoryError):
+        return {"error": f"File {file_path} not found"}
     except Exception as e:
         return {"error": f"Error reading file: {str(e)}"}
 
+def _drain(buf: io.StringIO) -> str:
+    """Return everything written to buf so far and empty it for reuse"""
+    chunk = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return chunk
+
+def _format_issues(coverity_data: Dict[str, Any], issues: List[Dict[str, Any]], project_root: str) -> Iterator[str]:
+    """
+    Yield the fix_coverity_issues report in chunks: the summary header,
+    one chunk per issue, then the fixing instructions. Consumers that can
+    stream never need the whole report in memory at once.
+    """
+    buf = io.StringIO()
+    w = buf.write
+    w(_SEP_EQ)
+    w("COVERITY ISSUES ANALYSIS\n")
+    w(_SEP_EQ)
+    w("\n")
+    
+    # Summary
+    summary = coverity_data.get('summary', {})
+    w(f"Total Issues: {summary.get('total_issues', len(issues))}\n")
+    w(f"High Severity: {summary.get('high_severity', 0)}\n")
+    w(f"Medium Severity: {summary.get('medium_severity', 0)}\n")
+    w(f"Low Severity: {summary.get('low_severity', 0)}\n")
+    w("\n")
+    w(_SEP_EQ)
+    w("\n")
+    yield _drain(buf)
+    
+    # Process each issue
+    for idx, issue in enumerate(issues, 1):
+        file_path = issue.get('file', 'Unknown')
+        line_number = issue.get('line', 0)
+        
+        w(f"ISSUE #{idx}: {issue.get('checker', 'Unknown')}\n")
+        w(_SEP_DASH)
+        w(f"File: {file_path}\n")
+        w(f"Line: {line_number}\n")
+        w(f"Function: {issue.get('function', 'Unknown')}\n")
+        w(f"Severity: {issue.get('severity', 'Unknown')}\n")
+        w(f"Category: {issue.get('category', 'Unknown')}\n")
+        w(f"CWE: {issue.get('cwe', 'N/A')}\n")
+        w("\n")
+        w(f"Description: {issue.get('description', 'No description')}\n")
+        w("\n")
+        w(f"Recommendation: {issue.get('recommendation', 'No recommendation provided')}\n")
+        w("\n")
+        
+        # Get file context. Files are looked up per issue rather than all held
+        # up front; the bounded read cache avoids re-reading recently used files
+        context = get_file_context(file_path, line_number, context_lines=5, project_root=project_root)
+        
+        if "error" in context:
+            w(f"Context: {context['error']}\n")
+        else:
+            w(f"CODE CONTEXT (Lines {context['start_line']}-{context['end_line']}):\n")
+            w(_SEP_DASH)
+            
+            # Add line numbers to context
+            for line_num, line in enumerate(context['lines'], context['start_line']):
+                marker = ">>> " if line_num == line_number else "    "
+                w(f"{marker}{line_num:4d} | {line}\n")
+            
+            w(_SEP_DASH)
+            w(f"Issue Line: {context['issue_line']}\n")
+        
+        w("\n")
+        w(_SEP_EQ)
+        w("\n")
+        yield _drain(buf)
+    
+    # Add fixing instructions
+    w("FIXING INSTRUCTIONS:\n")
+    w(_SEP_DASH)
+    w("To fix these issues:\n")
+    w("1. Review each issue's description and recommendation\n")
+    w("2. Navigate to the specified file and line number\n")
+    w("3. Apply the recommended fix based on the issue type\n")
+    w("4. Test the changes to ensure no functionality is broken\n")
+    w("5. Re-run Coverity analysis to verify the fix\n")
+    w("\n")
+    w("Common Fixes by Issue Type:\n")
+    w("- RESOURCE_LEAK: Use context managers (with statement)\n")
+    w("- NULL_POINTER: Add null/None checks before accessing\n")
+    w("- UNINITIALIZED_VARIABLE: Initialize variables at declaration\n")
+    w("- BUFFER_OVERFLOW: Add bounds checking and validation\n")
+    w("- MEMORY_LEAK: Implement proper cleanup and garbage collection\n")
+    w("- FORMAT_STRING_VULNERABILITY: Use parameterized formatting\n")
+    w("- PATH_TRAVERSAL: Validate and sanitize file paths\n")
+    w("- SQL_INJECTION: Use parameterized queries\n")
+    yield _drain(buf)
+
 @mcp.tool()
 def fix_coverity_issues(coverity_json_path: str = "coverity_issues.json") -> str:
     """
@@ -83,111 +270,23 @@ def fix_coverity_issues(coverity_json_path: str = "coverity_issues.json") -> str
     """
     try:
         # Determine project root
-        project_root = os.getcwd()
+        project_root = _PROJECT_ROOT
         
         # Read Coverity issues JSON
         json_full_path = os.path.join(project_root, coverity_json_path)
         
-        if not os.path.exists(json_full_path):
+        try:
+            coverity_data = _load_coverity_json(json_full_path)
+        except (FileNotFoundError, NotADirectoryError):
             return f"Error: Coverity issues file not found at {coverity_json_path}"
         
-        with open(json_full_path, 'r', encoding='utf-8') as f:
-            coverity_data = json.load(f)
-        
         issues = coverity_data.get('issues', [])
         
         if not issues:
             return "No Coverity issues found in the JSON file."
         
         # Build detailed response
-        response = []
-        response.append("=" * 80)
-        response.append("COVERITY ISSUES ANALYSIS")
-        response.append("=" * 80)
-        response.append("")
-        
-        # Summary
-        summary = coverity_data.get('summary', {})
-        response.append(f"Total Issues: {summary.get('total_issues', len(issues))}")
-        response.append(f"High Severity: {summary.get('high_severity', 0)}")
-        response.append(f"Medium Severity: {summary.get('medium_severity', 0)}")
-        response.append(f"Low Severity: {summary.get('low_severity', 0)}")
-        response.append("")
-        response.append("=" * 80)
-        response.append("")
-        
-        # Process each issue
-        for idx, issue in enumerate(issues, 1):
-            file_path = issue.get('file', 'Unknown')
-            line_number = issue.get('line', 0)
-            function = issue.get('function', 'Unknown')
-            checker = issue.get('checker', 'Unknown')
-            description = issue.get('description', 'No description')
-            severity = issue.get('severity', 'Unknown')
-            category = issue.get('category', 'Unknown')
-            cwe = issue.get('cwe', 'N/A')
-            recommendation = issue.get('recommendation', 'No recommendation provided')
-            
-            response.append(f"ISSUE #{idx}: {checker}")
-            response.append("-" * 80)
-            response.append(f"File: {file_path}")
-            response.append(f"Line: {line_number}")
-            response.append(f"Function: {function}")
-            response.append(f"Severity: {severity}")
-            response.append(f"Category: {category}")
-            response.append(f"CWE: {cwe}")
-            response.append("")
-            response.append(f"Description: {description}")
-            response.append("")
-            response.append(f"Recommendation: {recommendation}")
-            response.append("")
-            
-            # Get file context
-            context = get_file_context(file_path, line_number, context_lines=5, project_root=project_root)
-            
-            if "error" in context:
-                response.append(f"Context: {context['error']}")
-            else:
-                response.append(f"CODE CONTEXT (Lines {context['start_line']}-{context['end_line']}):")
-                response.append("-" * 80)
-                
-                # Add line numbers to context
-                context_lines = context['context'].split('\n')
-                for i, line in enumerate(context_lines):
-                    if line or i < len(context_lines) - 1:  # Skip only the last empty line
-                        line_num = context['start_line'] + i
-                        marker = ">>> " if line_num == line_number else "    "
-                        response.append(f"{marker}{line_num:4d} | {line}")
-                
-                response.append("-" * 80)
-                response.append(f"Issue Line: {context['issue_line']}")
-            
-            response.append("")
-            response.append("=" * 80)
-            response.append("")
-        
-        # Add fixing instructions
-        response.append("FIXING INSTRUCTIONS:")
-        response.append("-" * 80)
-        response.append("To fix these issues:")
-        response.append("1. Review each issue's description and recommendation")
-        response.append("2. Navigate to the specified file and line number")
-        response.append("3. Apply the recommended fix based on the issue type")
-        response.append("4. Test the changes to ensure no functionality is broken")
-        response.append("5. Re-run Coverity analysis to verify the fix")
-        response.append("")
-        response.append("Common Fixes by Issue Type:")
-        response.append("- RESOURCE_LEAK: Use context managers (with statement)")
-        response.append("- NULL_POINTER: Add null/None checks before accessing")
-        response.append("- UNINITIALIZED_VARIABLE: Initialize variables at declaration")
-        response.append("- BUFFER_OVERFLOW: Add bounds checking and validation")
-        response.append("- MEMORY_LEAK: Implement proper cleanup and garbage collection")
-        response.append("- FORMAT_STRING_VULNERABILITY: Use parameterized formatting")
-        response.append("- PATH_TRAVERSAL: Validate and sanitize file paths")
-        response.append("- SQL_INJECTION: Use parameterized queries")
-        response.append("")
-        
-        return "\n".join(response)
+        return "".join(_format_issues(coverity_data, issues, project_root))
         
     except json.JSONDecodeError as e:
         return f"Error: Invalid JSON format in {coverity_json_path}: {str(e)}"
@@ -207,59 +306,51 @@ def get_issue_by_file(file_path: str, coverity_json_path: str = "coverity_issues
         All issues found in the specified file with context
     """
     try:
-        project_root = os.getcwd()
+        project_root = _PROJECT_ROOT
         json_full_path = os.path.join(project_root, coverity_json_path)
         
-        if not os.path.exists(json_full_path):
+        try:
+            st = os.stat(json_full_path)
+        except (FileNotFoundError, NotADirectoryError):
             return f"Error: Coverity issues file not found at {coverity_json_path}"
         
-        with open(json_full_path, 'r', encoding='utf-8') as f:
-            coverity_data = json.load(f)
-        
-        issues = coverity_data.get('issues', [])
-        file_issues = [issue for issue in issues if issue.get('file') == file_path]
+        issue_index = _load_issue_index(json_full_path, st.st_mtime_ns, st.st_size)
+        file_issues = issue_index.get(file_path, ())
         
         if not file_issues:
             return f"No Coverity issues found in file: {file_path}"
         
-        response = []
-        response.append(f"COVERITY ISSUES IN {file_path}")
-        response.append("=" * 80)
-        response.append(f"Total Issues in File: {len(file_issues)}")
-        response.append("")
+        buf = io.StringIO()
+        w = buf.write
+        w(f"COVERITY ISSUES IN {file_path}\n")
+        w(_SEP_EQ)
+        w(f"Total Issues in File: {len(file_issues)}\n")
         
         for idx, issue in enumerate(file_issues, 1):
+            # Blank line separating this issue from the block above it
+            w("\n")
             line_number = issue.get('line', 0)
-            function = issue.get('function', 'Unknown')
-            checker = issue.get('checker', 'Unknown')
-            description = issue.get('description', 'No description')
-            severity = issue.get('severity', 'Unknown')
-            recommendation = issue.get('recommendation', 'No recommendation provided')
             
-            response.append(f"ISSUE #{idx}: {checker} (Line {line_number})")
-            response.append("-" * 80)
-            response.append(f"Function: {function}")
-            response.append(f"Severity: {severity}")
-            response.append(f"Description: {description}")
-            response.append(f"Recommendation: {recommendation}")
-            response.append("")
+            w(f"ISSUE #{idx}: {issue.get('checker', 'Unknown')} (Line {line_number})\n")
+            w(_SEP_DASH)
+            w(f"Function: {issue.get('function', 'Unknown')}\n")
+            w(f"Severity: {issue.get('severity', 'Unknown')}\n")
+            w(f"Description: {issue.get('description', 'No description')}\n")
+            w(f"Recommendation: {issue.get('recommendation', 'No recommendation provided')}\n")
+            w("\n")
             
             # Get context
             context = get_file_context(file_path, line_number, context_lines=3, project_root=project_root)
             if "error" not in context:
-                response.append(f"Code Context (Lines {context['start_line']}-{context['end_line']}):")
-                context_lines = context['context'].split('\n')
-                for i, line in enumerate(context_lines):
-                    if line or i < len(context_lines) - 1:
-                        line_num = context['start_line'] + i
-                        marker = ">>> " if line_num == line_number else "    "
-                        response.append(f"{marker}{line_num:4d} | {line}")
+                w(f"Code Context (Lines {context['start_line']}-{context['end_line']}):\n")
+                for line_num, line in enumerate(context['lines'], context['start_line']):
+                    marker = ">>> " if line_num == line_number else "    "
+                    w(f"{marker}{line_num:4d} | {line}\n")
             
-            response.append("")
-            response.append("=" * 80)
-            response.append("")
+            w("\n")
+            w(_SEP_EQ)
         
-        return "\n".join(response)
+        return buf.getvalue()
         
     except Exception as e:
         return f"Error: {str(e)}"
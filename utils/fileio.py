@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+File reading helpers used by the Coverity MCP server.
+"""
+
+import re
+
+# Large enough that typical source files are read in a single syscall
+READ_BUFFER_SIZE = 65536
+
+# A ".." path component, delimited by either separator or the path ends
+_TRAVERSAL_RE = re.compile(r'(?:^|[/\\])\.\.(?:[/\\]|$)')
+
+
+def has_parent_reference(path: str) -> bool:
+    """
+    Check whether a path contains a ".." component.
+    
+    Both "/" and "\\" count as separators, so Windows-style paths are
+    caught on every platform.
+    """
+    return _TRAVERSAL_RE.search(path) is not None
+
+
+def decode_text(raw: bytes) -> str:
+    """
+    Decode UTF-8 bytes, translating newlines the way text-mode reads do.
+    
+    "\\r\\n" and "\\r" become "\\n"; the replacements only run when the text
+    contains a carriage return.
+    """
+    text = raw.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
@@ -6,6 +6,36 @@ Helper utilities with Coverity issues for demonstration.
 import re
 from typing import Optional, Dict, Any
 
+# SQL keywords rejected by validate_config when they appear as whole words
+_SQL_KEYWORDS = frozenset(
+    ('OR', 'AND', 'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'DROP', 'UNION')
+)
+_SQL_PUNCTUATION = frozenset(';\'"\\')
+_WORD_RE = re.compile(r'\w+')
+_DB_NAME_RE = re.compile(r'^[a-zA-Z0-9_]+\Z')
+
+# Exact types accepted by the calculate_statistics fast path
+_NUMERIC_TYPES = (float, int)
+
+
+def _has_sql_injection(value: str) -> bool:
+    """
+    Check a string for SQL injection patterns.
+    
+    The value must be ASCII (validate_config rejects other hosts first).
+    For ASCII input this is equivalent to a case-insensitive search for
+    quote/escape characters, "--" or any of _SQL_KEYWORDS between word
+    boundaries, but scans each word once with set lookups instead of a
+    backtracking regex alternation. It is not equivalent for non-ASCII
+    input, where Unicode case folding would also match e.g. 'İnsert'.
+    """
+    if '--' in value or not _SQL_PUNCTUATION.isdisjoint(value):
+        return True
+    if len(value) < 2:
+        # Too short to hold any keyword
+        return False
+    return any(word.upper() in _SQL_KEYWORDS for word in _WORD_RE.findall(value))
+
 
 def get_value(data: Optional[Dict[str, Any]], key: str) -> Optional[Any]:
     """
@@ -70,56 +100,59 @@ def process_user_data(user_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     return result
 
 
+def _empty_statistics(count: int = 0) -> Dict[str, float]:
+    """Statistics result for input with no usable numbers."""
+    return {
+        'count': count,
+        'sum': 0.0,
+        'average': 0.0,
+        'min': 0.0,
+        'max': 0.0
+    }
+
+
 def calculate_statistics(numbers: Optional[list]) -> Dict[str, float]:
     """
     Calculate basic statistics from a list of numbers.
     
     FIXED COVERITY ISSUES:
-    - USE_AFTER_FREE: Create copy to prevent modification during iteration (CWE-416)
+    - USE_AFTER_FREE: Work on a private list built in one pass over the input (CWE-416)
     - INTEGER_OVERFLOW: Add overflow checking for arithmetic operations (CWE-190)
+    
+    Only int and float values are included; bools and other types are
+    ignored. 'count' is always the number of included values, including
+    when an integer too large for a float zeroes the other statistics.
     """
     if numbers is None or len(numbers) == 0:
-        return {
-            'count': 0,
-            'sum': 0.0,
-            'average': 0.0,
-            'min': 0.0,
-            'max': 0.0
-        }
-    
-    # Fix for USE_AFTER_FREE (CWE-416): Create a copy to prevent issues with list modification
-    numbers_copy = list(numbers)
-    
-    # Fix for INTEGER_OVERFLOW (CWE-190): Use float arithmetic and check for overflow
+        return _empty_statistics()
+    
+    # Fix for USE_AFTER_FREE (CWE-416): The input is read exactly once, into a
+    # private list of numbers, so later changes to it cannot affect the result.
+    # Exact int/float types take the fast path; subclasses other than bool
+    # fall back to isinstance
+    numeric = [num for num in numbers
+               if type(num) in _NUMERIC_TYPES
+               or (isinstance(num, (int, float)) and type(num) is not bool)]
+    count = len(numeric)
+    if count == 0:
+        return _empty_statistics()
+    
+    # Fix for INTEGER_OVERFLOW (CWE-190): Convert numbers to float once, up front
     try:
-        total_sum = 0.0
-        for num in numbers_copy:
-            # Check for potential overflow
-            if isinstance(num, (int, float)):
-                # Use float to handle large numbers
-                total_sum += float(num)
-            else:
-                continue
-        
-        count = len(numbers_copy)
-        average = total_sum / count if count > 0 else 0.0
-        
-        return {
-            'count': count,
-            'sum': total_sum,
-            'average': average,
-            'min': float(min(numbers_copy)),
-            'max': float(max(numbers_copy))
-        }
-    except (OverflowError, ValueError) as e:
-        # Handle overflow gracefully
-        return {
-            'count': len(numbers_copy),
-            'sum': 0.0,
-            'average': 0.0,
-            'min': 0.0,
-            'max': 0.0
-        }
+        values = list(map(float, numeric))
+    except OverflowError:
+        # Handle integers too large for a float gracefully
+        return _empty_statistics(count)
+    
+    # sum/min/max over a list of floats each run as a single C-level loop
+    total_sum = sum(values)
+    return {
+        'count': count,
+        'sum': total_sum,
+        'average': total_sum / count,
+        'min': min(values),
+        'max': max(values)
+    }
 
 
 def validate_config(config: Optional[Dict[str, Any]]) -> bool:
@@ -132,7 +165,9 @@ def validate_config(config: Optional[Dict[str, Any]]) -> bool:
     if config is None:
         return False
     
-    required_keys = ['host', 'port', 'database']
+    # Cheapest checks first, so invalid configs are rejected before the
+    # SQL injection scan of host runs
+    required_keys = ['port', 'database', 'host']
     
     # Fix for SQL_INJECTION (CWE-89): Validate and sanitize configuration parameters
     for key in required_keys:
@@ -143,12 +178,11 @@ def validate_config(config: Optional[Dict[str, Any]]) -> bool:
         
         # Validate each field type and content
         if key == 'host':
-            # Host should be a valid hostname or IP address
-            if not isinstance(value, str) or len(value) > 255:
+            # Host should be a valid hostname or IP address (IDNA-encoded, so ASCII)
+            if not isinstance(value, str) or len(value) > 255 or not value.isascii():
                 return False
             # Check for SQL injection patterns
-            if re.search(r'[;\'"\\]|--|\b(OR|AND|SELECT|INSERT|UPDATE|DELETE|DROP|UNION)\b', 
-                        str(value), re.IGNORECASE):
+            if _has_sql_injection(value):
                 return False
         
         elif key == 'port':
@@ -166,7 +200,7 @@ def validate_config(config: Optional[Dict[str, Any]]) -> bool:
             # Database name should be alphanumeric with underscores only
             if not isinstance(value, str) or len(value) > 64:
                 return False
-            if not re.match(r'^[a-zA-Z0-9_]+$', value):
+            if not _DB_NAME_RE.match(value):
                 return False
     
     return True